@@ -1,10 +1,26 @@
 import streamlit as st
 import os
 import glob
+import hashlib
+import re
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import itertools
+import threading
+import time
+import queue
+from collections import OrderedDict
 import numpy as np
+import torch
+try:
+    import faiss
+except ImportError:
+    # Without FAISS, search falls back to an exact torch.topk over all embeddings
+    faiss = None
 from sentence_transformers import SentenceTransformer
 import anthropic
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 import warnings
 
@@ -13,6 +29,16 @@ import warnings
 load_dotenv()
 warnings.filterwarnings('ignore')
 
+# Run the encoder and search on the GPU when one is available
+DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+
+# Let PyTorch use every core for CPU-only encoding
+if DEVICE == 'cpu':
+    torch.set_num_threads(os.cpu_count() or 1)
+else:
+    # Allow TF32 matmuls for the transformer on GPU
+    torch.set_float32_matmul_precision('high')
+
 # Set page configuration
 st.set_page_config(
     page_title="Astronomy AI Tutor Chat",
@@ -20,6 +46,12 @@ st.set_page_config(
     layout="wide"
 )
 
+# Only this many characters of each chunk are ever shown to Claude, so only these are embedded
+MAX_CHUNK_CHARS = 400
+
+# Start of every "## " section header line
+_SECTION_RE = re.compile(r'(?m)^## ')
+
 class DocumentProcessor:
     """
     A simplified class to process lecture documents for RAG implementation.
@@ -30,24 +62,29 @@ class DocumentProcessor:
         self.lecture_directory = lecture_directory
         self.chunks = []
         
+    def find_markdown_files(self) -> List[str]:
+        """Return the sorted paths of all markdown files in the lecture directory."""
+        pattern = os.path.join(self.lecture_directory, "*.md")
+        return sorted(glob.glob(pattern))
+        
     def load_and_process_documents(self) -> None:
         """Load all markdown files and process them into chunks."""
         try:
             # Find all markdown files
-            pattern = os.path.join(self.lecture_directory, "*.md")
-            markdown_files = glob.glob(pattern)
+            markdown_files = self.find_markdown_files()
             
             if not markdown_files:
                 raise FileNotFoundError(f"No markdown files found in {self.lecture_directory}")
             
             st.info(f"📚 Found {len(markdown_files)} lecture files")
             
+            # Read files concurrently; the GIL is released while waiting on disk
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                contents = list(executor.map(self._read_file, markdown_files))
+            
             total_chunks = 0
-            for file_path in markdown_files:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                filename = os.path.basename(file_path).replace('.md', '')
+            for file_path, content in zip(markdown_files, contents):
+                filename = Path(file_path).stem
                 doc_chunks = self.chunk_by_sections(content, filename)
                 self.chunks.extend(doc_chunks)
                 total_chunks += len(doc_chunks)
@@ -58,22 +95,26 @@ class DocumentProcessor:
             st.error(f"Error processing documents: {e}")
             raise
     
+    @staticmethod
+    def _read_file(file_path: str) -> str:
+        """Read a single markdown file."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    
     def chunk_by_sections(self, text: str, source_filename: str) -> List[Dict]:
         """Split document into chunks based on ## section headers."""
-        sections = text.split('\n## ')
+        # Slice the original text between header offsets instead of splitting it
+        positions = [m.start() for m in _SECTION_RE.finditer(text) if m.start() > 0]
+        boundaries = [0] + positions + [len(text)]
         chunks = []
         
-        for i, section in enumerate(sections):
-            # Add back the '## ' that was removed during split
-            if i == 0:
-                chunk_text = section
-            else:
-                chunk_text = '## ' + section
+        for i, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+            chunk_text = text[start:end].strip()
             
             # Only keep chunks with substantial content
-            if len(chunk_text.strip()) > 100:
+            if len(chunk_text) > 100:
                 chunks.append({
-                    'text': chunk_text.strip(),
+                    'text': chunk_text[:MAX_CHUNK_CHARS],
                     'source_file': source_filename,
                     'chunk_id': i
                 })
@@ -84,6 +125,125 @@ class DocumentProcessor:
         """Return the processed chunks."""
         return self.chunks
 
+# Corpus size above which an approximate HNSW graph index replaces exact search
+HNSW_MIN_CHUNKS = 5000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Corpus size above which vectors are product-quantized (~48 bytes each) to save memory
+PQ_MIN_CHUNKS = 100000
+PQ_NLIST = 16
+PQ_M = 48
+PQ_NBITS = 8
+PQ_NPROBE = 4
+
+# Number of chunks encoded per forward pass
+ENCODE_BATCH_SIZE = 64
+
+# Number of distinct queries whose embeddings / answers are remembered
+QUERY_CACHE_SIZE = 256
+
+# Dynamically quantized int8 ONNX export shipped with all-MiniLM-L6-v2 on the Hugging Face Hub
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+ONNX_INT8_FILE = 'onnx/model_quint8_avx2.onnx'
+# Run the PyTorch BERT blocks through fused scaled_dot_product_attention kernels
+TORCH_MODEL_KWARGS = {'attn_implementation': 'sdpa'}
+
+def load_encoder() -> SentenceTransformer:
+    """Load the embedding model: fp16 PyTorch on GPU, int8 ONNX Runtime on CPU."""
+    if DEVICE == 'cuda':
+        model = SentenceTransformer(EMBEDDING_MODEL, device=DEVICE, model_kwargs=TORCH_MODEL_KWARGS)
+        model.half()
+        return model
+    
+    try:
+        return SentenceTransformer(
+            EMBEDDING_MODEL,
+            backend='onnx',
+            model_kwargs={'file_name': ONNX_INT8_FILE, 'provider': 'CPUExecutionProvider'}
+        )
+    except Exception as e:
+        # Fall back to PyTorch if onnxruntime/optimum is missing or the export can't be loaded
+        st.warning(f"⚠️ ONNX encoder unavailable, using PyTorch: {e}")
+        return SentenceTransformer(EMBEDDING_MODEL, model_kwargs=TORCH_MODEL_KWARGS)
+
+def encoder_tag(model: SentenceTransformer) -> str:
+    """Describe which encoder variant was actually loaded, since embeddings differ between them."""
+    backend = getattr(model, 'backend', 'torch')
+    if backend == 'onnx':
+        return f"{EMBEDDING_MODEL}:onnx:{ONNX_INT8_FILE}"
+    precision = 'fp16' if model.device.type == 'cuda' else 'fp32'
+    return f"{EMBEDDING_MODEL}:torch:{model.device.type}:{precision}"
+
+# Queries arriving within this window are encoded together, up to the batch limit
+QUERY_BATCH_WAIT_SECONDS = 0.01
+QUERY_BATCH_MAX_SIZE = 32
+
+class QueryBatcher:
+    """
+    Collects queries from concurrent sessions and encodes them in one forward pass.
+    """
+    
+    def __init__(self, model: SentenceTransformer):
+        """Start the background worker thread."""
+        self.model = model
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+    
+    def encode(self, query: str) -> np.ndarray:
+        """Encode a query into a normalized float32 vector of shape (1, dim)."""
+        future = Future()
+        self.requests.put((query, future))
+        return future.result()
+    
+    def _run(self) -> None:
+        """Drain the queue in small time windows and encode each batch at once."""
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + QUERY_BATCH_WAIT_SECONDS
+            while len(batch) < QUERY_BATCH_MAX_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            queries = [query for query, _ in batch]
+            try:
+                with torch.inference_mode():
+                    embeddings = self.model.encode(
+                        queries,
+                        batch_size=QUERY_BATCH_MAX_SIZE,
+                        show_progress_bar=False,
+                        normalize_embeddings=True,
+                        convert_to_numpy=True
+                    ).astype(np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for i, (_, future) in enumerate(batch):
+                future.set_result(embeddings[i:i + 1])
+
+# One encoder instance is shared by every VectorStore in the process
+@st.cache_resource
+def _get_encoder() -> SentenceTransformer:
+    """Load the embedding model once and put it in inference mode."""
+    model = load_encoder()
+    model.eval()
+    return model
+
+# The batcher and its worker thread are shared the same way, instead of one per VectorStore
+@st.cache_resource
+def _get_batcher() -> QueryBatcher:
+    """Start the query batcher for the shared encoder once per process."""
+    return QueryBatcher(_get_encoder())
+
 class VectorStore:
     """
     A simplified class to manage embeddings and similarity search.
@@ -92,42 +252,220 @@ class VectorStore:
     def __init__(self):
         """Initialize the VectorStore."""
         with st.spinner("🔄 Loading sentence transformer model..."):
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chunks = []
+            self.model = _get_encoder()
+        # Chunk metadata stored as parallel arrays indexed by embedding row
+        self.texts = np.array([], dtype=object)
+        self.sources = np.array([], dtype=object)
+        self.ids = np.array([], dtype=np.int32)
+        self.index = None
+        # Only used when FAISS is not installed; kept resident on DEVICE
         self.embeddings = None
+        # Set when the FAISS index has been copied to the GPU
+        self.gpu_resources = None
+        # Concurrent queries share one encoder forward pass
+        self.batcher = _get_batcher()
+        # Repeated questions (e.g. sidebar samples) skip the encoder entirely
+        self.embed_query = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._encode_query)
         
     def add_chunks(self, chunks: List[Dict]) -> None:
-        """Add chunks and create embeddings."""
+        """Add chunks and build a FAISS inner-product index over their embeddings."""
         with st.spinner(f"🧠 Creating embeddings for {len(chunks)} chunks..."):
-            self.chunks = chunks
-            chunk_texts = [chunk['text'] for chunk in chunks]
-            self.embeddings = self.model.encode(chunk_texts, convert_to_tensor=True)
+            self.texts = np.array([chunk['text'] for chunk in chunks], dtype=object)
+            self.sources = np.array([chunk['source_file'] for chunk in chunks], dtype=object)
+            self.ids = np.array([chunk['chunk_id'] for chunk in chunks], dtype=np.int32)
+            # Normalized embeddings make inner product equal to cosine similarity
+            with torch.inference_mode():
+                embeddings = self.model.encode(
+                    self.texts.tolist(),
+                    batch_size=ENCODE_BATCH_SIZE,
+                    show_progress_bar=False,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True
+                ).astype(np.float32)
+            if faiss is None:
+                self.embeddings = torch.from_numpy(embeddings).to(DEVICE)
+            else:
+                self.index = self._to_gpu(self._build_index(embeddings))
         
-        st.success(f"✅ Created embeddings with dimension: {self.embeddings.shape[1]}")
+        st.success(f"✅ Created embeddings with dimension: {embeddings.shape[1]}")
+    
+    def _build_index(self, embeddings: np.ndarray) -> "faiss.Index":
+        """Build an exact index for small corpora, HNSW for large ones and IVF-PQ for huge ones."""
+        dim = embeddings.shape[1]
+        if len(embeddings) < HNSW_MIN_CHUNKS:
+            index = faiss.IndexFlatIP(dim)
+        elif len(embeddings) >= PQ_MIN_CHUNKS:
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFPQ(quantizer, dim, PQ_NLIST, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+            index.train(embeddings)
+            index.nprobe = PQ_NPROBE
+        else:
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        index.add(embeddings)
+        return index
+    
+    def _to_gpu(self, index: "faiss.Index") -> "faiss.Index":
+        """Copy the index to the GPU when CUDA and a GPU build of FAISS are available."""
+        if DEVICE != 'cuda' or not hasattr(faiss, 'StandardGpuResources'):
+            return index
+        try:
+            gpu_resources = faiss.StandardGpuResources()
+            gpu_index = faiss.index_cpu_to_gpu(gpu_resources, 0, index)
+        except RuntimeError:
+            # Not every index type (e.g. HNSW) has a GPU implementation
+            return index
+        self.gpu_resources = gpu_resources
+        return gpu_index
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a single query into a normalized float32 vector of shape (1, dim)."""
+        return self.batcher.encode(query)
     
     def search(self, query: str, top_k: int = 3) -> List[Dict]:
         """Search for relevant chunks based on similarity."""
-        if self.embeddings is None:
+        return self.search_by_vector(self.embed_query(query), top_k)
+    
+    def search_by_vector(self, query_embedding: np.ndarray, top_k: int = 3) -> List[Dict]:
+        """Search for relevant chunks given an already encoded query."""
+        if faiss is None:
+            scores, indices = self._search_torch(query_embedding, top_k)
+        elif self.index is not None and self.index.ntotal > 0:
+            # FAISS returns the top_k scores and indices already sorted
+            scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
+            scores, indices = scores[0].tolist(), indices[0].tolist()
+        else:
             return []
         
-        # Get query embedding
-        query_embedding = self.model.encode([query], convert_to_tensor=True)
+        results = []
+        for idx, score in zip(indices, scores):
+            if idx != -1 and score > 0.1:  # minimum similarity threshold
+                results.append({
+                    'text': self.texts[idx],
+                    'source_file': self.sources[idx],
+                    'chunk_id': int(self.ids[idx]),
+                    'similarity_score': float(score)
+                })
+        
+        return results
+    
+    def _search_torch(self, query_embedding: np.ndarray, top_k: int) -> Tuple[List[float], List[int]]:
+        """Exact top-k search with a partial selection instead of a full sort."""
+        if self.embeddings is None or self.embeddings.shape[0] == 0:
+            return [], []
         
-        # Calculate similarities
-        from sentence_transformers.util import cos_sim
-        similarities = cos_sim(query_embedding, self.embeddings)[0]
+        query = torch.from_numpy(query_embedding[0]).to(DEVICE)
+        similarities = self.embeddings @ query
+        scores, top_indices = torch.topk(similarities, k=min(top_k, similarities.numel()))
+        return scores.tolist(), top_indices.tolist()
+    
+    def save(self, path: str) -> None:
+        """Save the chunks and index (or raw embeddings without FAISS) using path as a file prefix."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {
+            'texts': self.texts.astype(str),
+            'source_files': self.sources.astype(str),
+            'chunk_ids': self.ids
+        }
+        if faiss is None:
+            arrays['embeddings'] = self.embeddings.cpu().numpy()
+        else:
+            index = self.index if self.gpu_resources is None else faiss.index_gpu_to_cpu(self.index)
+            # Write to a temp file and rename so a crash never leaves a truncated cache behind
+            tmp_path = f"{path}.faiss.{os.getpid()}.tmp"
+            faiss.write_index(index, tmp_path)
+            os.replace(tmp_path, f"{path}.faiss")
         
-        # Get top results
-        top_indices = similarities.argsort(descending=True)[:top_k]
+        # The .npz goes last since load() treats it as the marker of a complete cache
+        tmp_path = f"{path}.npz.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, f"{path}.npz")
+    
+    def load(self, path: str) -> bool:
+        """Load data saved by save(). Returns False if no usable cache exists."""
+        if not os.path.exists(f"{path}.npz"):
+            return False
+        if faiss is not None and not os.path.exists(f"{path}.faiss"):
+            return False
         
-        results = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # minimum similarity threshold
-                result = self.chunks[idx].copy()
-                result['similarity_score'] = float(similarities[idx])
-                results.append(result)
+        try:
+            embeddings = None
+            index = None
+            with np.load(f"{path}.npz") as data:
+                if faiss is None:
+                    if 'embeddings' not in data:
+                        return False
+                    embeddings = torch.from_numpy(data['embeddings']).to(DEVICE)
+                texts = data['texts'].astype(object)
+                sources = data['source_files'].astype(object)
+                ids = data['chunk_ids']
+            if faiss is not None:
+                index = faiss.read_index(f"{path}.faiss")
+        except Exception as e:
+            # A corrupt or unreadable cache is rebuilt rather than breaking startup
+            st.warning(f"⚠️ Ignoring unreadable embedding cache: {e}")
+            return False
         
-        return results
+        self.texts, self.sources, self.ids = texts, sources, ids
+        self.embeddings = embeddings
+        if index is not None:
+            self.index = self._to_gpu(index)
+        return True
+
+# Directory for embeddings persisted across app restarts
+CACHE_DIRECTORY = "cache"
+# Bump whenever chunking or the embedding model changes to invalidate old caches
+CACHE_VERSION = "3"
+
+def _cache_key(markdown_files: List[str], encoder: str) -> str:
+    """Hash the encoder variant plus file names, sizes and modification times so changes invalidate the cache."""
+    digest = hashlib.md5(f"{CACHE_VERSION}:{encoder}\n".encode())
+    for file_path in markdown_files:
+        stat = os.stat(file_path)
+        digest.update(f"{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def _prune_cache(current_key: str) -> None:
+    """Delete cache files left behind by older versions of the lecture materials."""
+    for file_name in os.listdir(CACHE_DIRECTORY):
+        key, extension = os.path.splitext(file_name)
+        # Temp files may belong to another worker that is still writing
+        if extension in ('.npz', '.faiss') and key != current_key:
+            try:
+                os.remove(os.path.join(CACHE_DIRECTORY, file_name))
+            except OSError:
+                pass
+
+def build_vector_store(lecture_directory: str) -> VectorStore:
+    """Load documents and create embeddings, reusing the on-disk cache when possible."""
+    document_processor = DocumentProcessor(lecture_directory)
+    vector_store = VectorStore()
+    
+    with st.spinner("🚀 Initializing AI Tutor..."):
+        markdown_files = document_processor.find_markdown_files()
+        cache_key = _cache_key(markdown_files, encoder_tag(vector_store.model))
+        cache_path = os.path.join(CACHE_DIRECTORY, cache_key)
+        
+        if vector_store.load(cache_path):
+            st.info(f"♻️ Loaded {len(vector_store.texts)} cached chunks from disk")
+        else:
+            # Process documents
+            document_processor.load_and_process_documents()
+            chunks = document_processor.get_chunks()
+            
+            # Create embeddings
+            vector_store.add_chunks(chunks)
+            
+            try:
+                vector_store.save(cache_path)
+                _prune_cache(cache_key)
+            except OSError as e:
+                st.warning(f"⚠️ Could not cache embeddings to disk: {e}")
+    
+    st.success("🎉 AI Tutor Ready!")
+    return vector_store
 
 class AITutor:
     """
@@ -136,8 +474,9 @@ class AITutor:
     
     def __init__(self, lecture_directory: str, api_key: str = None):
         """Initialize the AI Tutor."""
-        self.document_processor = DocumentProcessor(lecture_directory)
-        self.vector_store = VectorStore()
+        self.lecture_directory = lecture_directory
+        # Built by initialize(), or attached directly by from_store()
+        self.vector_store = None
         
         # Setup Anthropic client
         if api_key:
@@ -149,32 +488,41 @@ class AITutor:
                 self.client = None
         else:
             self.client = None
+        
+        # LRU cache of Claude answers keyed by the full prompt
+        self.response_cache = OrderedDict()
+        self.response_cache_lock = threading.Lock()
+    
+    @classmethod
+    def from_store(cls, vector_store: VectorStore, api_key: str = None, lecture_directory: str = None) -> "AITutor":
+        """Create a tutor around an already built vector store, skipping initialize()."""
+        tutor = cls(lecture_directory, api_key)
+        tutor.vector_store = vector_store
+        return tutor
     
     def initialize(self):
-        """Load documents and create embeddings."""
-        with st.spinner("🚀 Initializing AI Tutor..."):
-            # Process documents
-            self.document_processor.load_and_process_documents()
-            chunks = self.document_processor.get_chunks()
-            
-            # Create embeddings
-            self.vector_store.add_chunks(chunks)
-        
-        st.success("🎉 AI Tutor Ready!")
+        """Load documents and create embeddings for this tutor's lecture directory."""
+        self.vector_store = build_vector_store(self.lecture_directory)
     
     def ask(self, question: str) -> str:
-        """Ask a question and get an AI response."""
+        """Ask a question and get the complete AI response."""
+        return "".join(self.ask_stream(question))
+    
+    def ask_stream(self, question: str) -> Iterator[str]:
+        """Ask a question and yield the AI response as it is generated."""
         # Find relevant content using top 3 chunks
-        relevant_chunks = self.vector_store.search(question, top_k=3)
+        relevant_chunks = self.vector_store.search(question, top_k=3) if self.vector_store is not None else []
         
         if not relevant_chunks:
-            return "Sorry, I couldn't find relevant information for your question in the course materials."
+            yield "Sorry, I couldn't find relevant information for your question in the course materials."
+            return
         
         if not self.client:
-            return "AI responses not available. Please enter your Anthropic API key in the sidebar."
+            yield "AI responses not available. Please enter your Anthropic API key in the sidebar."
+            return
         
         # Prepare context from retrieved chunks
-        context = "\n\n".join([chunk['text'][:400] for chunk in relevant_chunks])
+        context = "\n\n".join([chunk['text'] for chunk in relevant_chunks])
         
         # Simple prompt for Claude with strict length constraints
         prompt = f"""Answer this student's question about astronomy programming based on the course materials:
@@ -186,23 +534,60 @@ Course Materials:
 
 IMPORTANT: Provide a clear, helpful answer as an astronomy programming tutor. Keep your response concise and under 400 words (approximately 500 tokens). Do not exceed this limit. Focus on the most essential information to answer the question directly."""
         
+        cached_answer = self._cached_response(prompt)
+        if cached_answer is not None:
+            yield cached_answer
+            return
+        
+        # Stream tokens so the student sees the answer start right away
+        pieces = []
         try:
-            response = self.client.messages.create(
+            with self.client.messages.stream(
                 model="claude-sonnet-4-5-20250929",
                 max_tokens=500,
                 messages=[{"role": "user", "content": prompt}]
-            )
-            return response.content[0].text
+            ) as stream:
+                for text in stream.text_stream:
+                    pieces.append(text)
+                    yield text
         except Exception as e:
-            return f"Error getting AI response: {e}"
+            # Keep the error visually separate from any partial answer already shown
+            if pieces:
+                yield "\n\n"
+            yield f"Error getting AI response: {e}"
+            return
+        
+        answer = "".join(pieces)
+        if answer:
+            self._cache_response(prompt, answer)
+    
+    def _cached_response(self, prompt: str) -> Optional[str]:
+        """Return a previously generated answer for this prompt, if any."""
+        with self.response_cache_lock:
+            if prompt not in self.response_cache:
+                return None
+            self.response_cache.move_to_end(prompt)
+            return self.response_cache[prompt]
+    
+    def _cache_response(self, prompt: str, answer: str) -> None:
+        """Remember an answer, evicting the least recently used one when full."""
+        with self.response_cache_lock:
+            self.response_cache[prompt] = answer
+            self.response_cache.move_to_end(prompt)
+            if len(self.response_cache) > QUERY_CACHE_SIZE:
+                self.response_cache.popitem(last=False)
+
+# Documents and embeddings don't depend on the API key, so build them once for all keys
+@st.cache_resource
+def _build_store() -> VectorStore:
+    """Build the lecture vector store with caching."""
+    return build_vector_store("Lecture")
 
 # Cache the tutor initialization to prevent reloading
 @st.cache_resource
 def initialize_tutor(api_key):
     """Initialize the AI tutor with caching."""
-    tutor = AITutor("Lecture", api_key)
-    tutor.initialize()
-    return tutor
+    return AITutor.from_store(_build_store(), api_key)
 
 # Main Streamlit App
 def main():
@@ -280,9 +665,11 @@ def main():
         
         # Get AI response
         with st.chat_message("assistant"):
+            # Show the spinner during retrieval and until Claude's first token arrives
+            stream = tutor.ask_stream(prompt)
             with st.spinner("🤔 Thinking..."):
-                response = tutor.ask(prompt)
-            st.write(response)
+                first_chunk = next(stream, "")
+            response = st.write_stream(itertools.chain([first_chunk], stream))
         
         # Add assistant response to chat history
         st.session_state.messages.append({"role": "assistant", "content": response})